@@ -4,16 +4,14 @@ Construit avec Streamlit et Plotly
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import sys
-import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Ajouter le répertoire scripts au chemin
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
-
-from data_fetcher import ForexDataFetcher, get_available_pairs
+from scripts.data_fetcher import SIGNAL_LABELS, ForexDataFetcher, get_available_pairs
 
 # Configuration de la page
 st.set_page_config(
@@ -27,8 +25,14 @@ st.set_page_config(
 st.title("📈 Tableau de Bord d'Analyse Technique Forex")
 st.markdown("Analyse technique en temps réel pour les paires de devises Forex")
 
-# Initialiser le fetcher
-fetcher = ForexDataFetcher()
+# Initialiser le fetcher (une seule instance partagée entre les ré-exécutions)
+@st.cache_resource
+def get_fetcher():
+    """Retourne l'instance partagée du fetcher de données."""
+    return ForexDataFetcher()
+
+
+fetcher = get_fetcher()
 available_pairs = get_available_pairs()
 
 # Sidebar pour les paramètres
@@ -56,81 +60,198 @@ interval = st.sidebar.selectbox(
     index=0
 )
 
-# Sélection des indicateurs à afficher
-st.sidebar.header("📊 Indicateurs")
-show_sma = st.sidebar.checkbox("Moyennes Mobiles (SMA 20/50)", value=True)
-show_ema = st.sidebar.checkbox("Moyennes Exponentielles (EMA 12/26)", value=False)
-show_bb = st.sidebar.checkbox("Bandes de Bollinger", value=True)
-show_rsi = st.sidebar.checkbox("RSI (14)", value=True)
-show_macd = st.sidebar.checkbox("MACD", value=True)
-show_stoch = st.sidebar.checkbox("Stochastique", value=False)
-
-# Bouton pour rafraîchir les données
+# Bouton pour rafraîchir les données : les caches écrits avant ce clic sont ignorés
 if st.sidebar.button("🔄 Rafraîchir les données", use_container_width=True):
-    st.session_state.refresh = True
+    st.session_state.refresh_at = time.time()
 
-# Récupérer et traiter les données
-@st.cache_data(ttl=3600)
-def load_data(pair, period, interval):
-    """Charge et traite les données Forex."""
-    df = fetcher.fetch_forex_data(pair, period=period, interval=interval)
-    if df is not None:
-        df = fetcher.calculate_indicators(df)
-    return df
+# Durée de validité du cache selon l'intervalle des barres (en secondes)
+CACHE_TTL = {
+    "1d": 3600 * 6,
+    "1wk": 3600 * 24,
+    "1mo": 3600 * 24 * 7,
+}
 
-# Charger les données
-df = load_data(selected_pair, period, interval)
 
-if df is None or df.empty:
-    st.error("❌ Impossible de récupérer les données. Veuillez réessayer.")
-else:
-    # Afficher les statistiques clés
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    last_close = df['Close'].iloc[-1]
-    prev_close = df['Close'].iloc[-2]
-    change = last_close - prev_close
-    change_pct = (change / prev_close) * 100
-    
-    with col1:
-        st.metric("Prix Actuel", f"{last_close:.5f}")
+def _ttl_for(interval):
+    """Retourne la durée de validité du cache pour un intervalle (60 s en intraday)."""
+    return CACHE_TTL.get(interval, 60)
+
+
+def _window_start(interval):
+    """
+    Retourne le début de la fenêtre de validité courante (timestamp Unix).
     
-    with col2:
-        st.metric("Variation", f"{change:.5f}", f"{change_pct:.2f}%")
+    Les fenêtres sont alignées sur l'epoch et durent le TTL de l'intervalle ;
+    un clic sur « Rafraîchir » en ouvre une nouvelle pour la session.
+    """
+    ttl = _ttl_for(interval)
+    start = int(time.time() // ttl) * ttl
+    return max(start, st.session_state.get("refresh_at", 0))
+
+
+class DataUnavailableError(Exception):
+    """Levée quand aucune donnée n'a pu être récupérée (jamais mise en cache)."""
+
+
+# Récupérer et traiter les données
+@st.cache_data(ttl=max(CACHE_TTL.values()))
+def _fetch(pair, period, interval, min_mtime):
+    """
+    Récupère les données Forex brutes.
     
-    with col3:
-        st.metric("Haut (52 sem.)", f"{df['High'].max():.5f}")
+    `min_mtime` est le début de la fenêtre de validité courante : il change
+    quand le TTL propre à l'intervalle expire, ce qui invalide l'entrée.
+    Le cache disque n'est accepté que s'il a été écrit dans cette fenêtre.
+    Un échec lève DataUnavailableError pour ne pas être mis en cache.
+    """
+    df = fetcher.fetch_forex_data(pair, period=period, interval=interval, min_mtime=min_mtime)
+    if df is None:
+        raise DataUnavailableError(pair)
+    return df
+
+
+@st.cache_data(ttl=max(CACHE_TTL.values()))
+def _compute(df):
+    """Calcule les indicateurs, mis en cache selon le contenu du DataFrame."""
+    return fetcher.calculate_indicators(df)
+
+
+@st.cache_resource
+def _prefetch_executor():
+    """Pool partagé pour le préchargement en arrière-plan (requêtes Yahoo limitées)."""
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix="prefetch")
+
+
+@st.cache_resource(ttl=max(CACHE_TTL.values()), show_spinner=False)
+def warm_all(period, interval, min_mtime, _skip=None):
+    """
+    Précharge en arrière-plan les autres paires dans le cache disque.
     
-    with col4:
-        st.metric("Bas (52 sem.)", f"{df['Low'].min():.5f}")
+    Lancé une fois par fenêtre de validité, après le chargement de la paire
+    affichée (`_skip`), et jamais attendu : changer ensuite de paire relit
+    le fichier Parquet au lieu d'attendre un téléchargement.
+    """
+    executor = _prefetch_executor()
+    for pair in available_pairs.values():
+        if pair != _skip:
+            executor.submit(fetcher.fetch_forex_data, pair, period=period, interval=interval, min_mtime=min_mtime)
+
+
+def load_data(pair, period, interval, min_mtime):
+    """Charge et traite les données Forex (None si indisponibles)."""
+    try:
+        df = _fetch(pair, period, interval, min_mtime)
+    except DataUnavailableError:
+        return None
+    return _compute(df)
+
+
+OHLC_COLS = ['Open', 'High', 'Low', 'Close']
+DISPLAY_COLS = ['Open', 'High', 'Low', 'Close', 'RSI', 'MACD', 'Signal']
+STATS_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def describe_ohlc(arr):
+    """Statistiques descriptives (comme describe()) calculées en réductions NumPy."""
+    return np.vstack([
+        np.full(arr.shape[1], arr.shape[0]),
+        arr.mean(axis=0),
+        arr.std(axis=0, ddof=1),
+        arr.min(axis=0),
+        np.quantile(arr, [0.25, 0.5, 0.75], axis=0),
+        arr.max(axis=0)
+    ])
+
+
+@st.cache_data(ttl=max(CACHE_TTL.values()))
+def display_tables(key, _df):
+    """
+    Prépare les tables de données brutes (dernières barres et statistiques).
     
-    with col5:
-        st.metric("Signal Actuel", df['Signal'].iloc[-1], 
-                 delta="BUY" if df['Signal'].iloc[-1] == "BUY" else ("SELL" if df['Signal'].iloc[-1] == "SELL" else "HOLD"))
+    Mis en cache sur `key` (paire, période, intervalle, fenêtre de validité,
+    dernière barre) : le DataFrame lui-même n'est pas haché.
+    """
+    tail = _df[DISPLAY_COLS].tail(10)
+    tail = tail.assign(Signal=tail['Signal'].map(SIGNAL_LABELS))
+    stats = describe_ohlc(_df[OHLC_COLS].to_numpy(dtype=np.float64))
+    return tail, pd.DataFrame(stats, index=STATS_INDEX, columns=OHLC_COLS)
+
+
+def _hline_shape(row, y, color):
+    """Ligne horizontale pointillée couvrant le sous-graphique de la ligne `row`."""
+    suffix = "" if row == 1 else str(row)
+    return dict(
+        type="line",
+        xref=f"x{suffix} domain", x0=0, x1=1,
+        yref=f"y{suffix}", y0=y, y1=y,
+        line=dict(dash="dash", color=color)
+    )
+
+
+@st.fragment
+def render_chart(df, pair_name):
+    """
+    Affiche le graphique et ses indicateurs.
     
-    st.divider()
+    Exécuté en fragment : cocher un indicateur ne ré-exécute que ce bloc,
+    sans repasser par le chargement des données.
+    """
+    # Sélection des indicateurs à afficher
+    st.subheader("📊 Indicateurs")
+    ind_cols = st.columns(6)
+    show_sma = ind_cols[0].checkbox("Moyennes Mobiles (SMA 20/50)", value=True)
+    show_ema = ind_cols[1].checkbox("Moyennes Exponentielles (EMA 12/26)", value=False)
+    show_bb = ind_cols[2].checkbox("Bandes de Bollinger", value=True)
+    show_rsi = ind_cols[3].checkbox("RSI (14)", value=True)
+    show_macd = ind_cols[4].checkbox("MACD", value=True)
+    show_stoch = ind_cols[5].checkbox("Stochastique", value=False)
     
     # Créer le graphique principal avec sous-graphiques
     num_subplots = 1
+    rsi_row = macd_row = stoch_row = None
     if show_rsi:
         num_subplots += 1
+        rsi_row = num_subplots
     if show_macd:
         num_subplots += 1
+        macd_row = num_subplots
     if show_stoch:
         num_subplots += 1
+        stoch_row = num_subplots
     
-    # Créer les subplots
+    # Niveaux de suracheté/survente, passés d'un bloc dans le layout
+    shapes = []
+    if rsi_row is not None:
+        shapes += [_hline_shape(rsi_row, 70, "red"), _hline_shape(rsi_row, 30, "green")]
+    if stoch_row is not None:
+        shapes += [_hline_shape(stoch_row, 80, "red"), _hline_shape(stoch_row, 20, "green")]
+    
+    # Créer les subplots avec le layout fourni dès la construction
     specs = [[{"secondary_y": False}] for _ in range(num_subplots)]
+    layout = go.Layout(
+        title=f"Analyse Technique - {pair_name}",
+        xaxis_title="Date",
+        yaxis_title="Prix",
+        template="plotly_dark",
+        height=800,
+        hovermode='x unified',
+        margin=dict(l=50, r=50, t=100, b=50),
+        shapes=shapes
+    )
     fig = make_subplots(
         rows=num_subplots, cols=1,
         shared_xaxes=True,
         vertical_spacing=0.08,
         specs=specs,
-        row_heights=[0.5] + [0.15] * (num_subplots - 1)
+        row_heights=[0.5] + [0.15] * (num_subplots - 1),
+        figure=go.Figure(layout=layout)
     )
     
+    # Traces regroupées par ligne, ajoutées en un seul appel à la fin
+    row_traces = {}
+    
     # Graphique principal avec chandeliers
-    fig.add_trace(
+    row_traces[1] = [
         go.Candlestick(
             x=df.index,
             open=df['Open'],
@@ -140,60 +261,51 @@ else:
             name="OHLC",
             increasing_line_color='green',
             decreasing_line_color='red'
-        ),
-        row=1, col=1
-    )
+        )
+    ]
     
     # Ajouter les Moyennes Mobiles
     if show_sma:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[1] += [
+            go.Scattergl(
                 x=df.index, y=df['SMA_20'],
                 mode='lines',
                 name='SMA 20',
                 line=dict(color='blue', width=1),
                 opacity=0.7
             ),
-            row=1, col=1
-        )
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df.index, y=df['SMA_50'],
                 mode='lines',
                 name='SMA 50',
                 line=dict(color='orange', width=1),
                 opacity=0.7
             ),
-            row=1, col=1
-        )
+        ]
     
     # Ajouter les Moyennes Exponentielles
     if show_ema:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[1] += [
+            go.Scattergl(
                 x=df.index, y=df['EMA_12'],
                 mode='lines',
                 name='EMA 12',
                 line=dict(color='purple', width=1, dash='dash'),
                 opacity=0.7
             ),
-            row=1, col=1
-        )
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df.index, y=df['EMA_26'],
                 mode='lines',
                 name='EMA 26',
                 line=dict(color='brown', width=1, dash='dash'),
                 opacity=0.7
             ),
-            row=1, col=1
-        )
+        ]
     
     # Ajouter les Bandes de Bollinger
     if show_bb:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[1] += [
+            go.Scattergl(
                 x=df.index, y=df['BB_High'],
                 mode='lines',
                 name='BB High',
@@ -201,10 +313,7 @@ else:
                 opacity=0.3,
                 showlegend=False
             ),
-            row=1, col=1
-        )
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df.index, y=df['BB_Low'],
                 mode='lines',
                 name='BB Low',
@@ -214,103 +323,121 @@ else:
                 fillcolor='rgba(128,128,128,0.1)',
                 showlegend=False
             ),
-            row=1, col=1
-        )
+        ]
     
     # Ajouter le RSI
-    current_row = 2
     if show_rsi:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[rsi_row] = [
+            go.Scattergl(
                 x=df.index, y=df['RSI'],
                 mode='lines',
                 name='RSI (14)',
                 line=dict(color='purple', width=2)
-            ),
-            row=current_row, col=1
-        )
-        
-        # Ajouter les niveaux de suracheté/survente
-        fig.add_hline(y=70, line_dash="dash", line_color="red", row=current_row, col=1)
-        fig.add_hline(y=30, line_dash="dash", line_color="green", row=current_row, col=1)
-        
-        current_row += 1
+            )
+        ]
     
     # Ajouter le MACD
     if show_macd:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[macd_row] = [
+            go.Scattergl(
                 x=df.index, y=df['MACD'],
                 mode='lines',
                 name='MACD',
                 line=dict(color='blue', width=2)
             ),
-            row=current_row, col=1
-        )
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df.index, y=df['MACD_Signal'],
                 mode='lines',
                 name='Signal',
                 line=dict(color='red', width=2)
             ),
-            row=current_row, col=1
-        )
-        
-        current_row += 1
+        ]
     
     # Ajouter le Stochastique
     if show_stoch:
-        fig.add_trace(
-            go.Scatter(
+        row_traces[stoch_row] = [
+            go.Scattergl(
                 x=df.index, y=df['Stoch_K'],
                 mode='lines',
                 name='Stoch K',
                 line=dict(color='blue', width=1)
             ),
-            row=current_row, col=1
-        )
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=df.index, y=df['Stoch_D'],
                 mode='lines',
                 name='Stoch D',
                 line=dict(color='red', width=1)
             ),
-            row=current_row, col=1
-        )
-        
-        fig.add_hline(y=80, line_dash="dash", line_color="red", row=current_row, col=1)
-        fig.add_hline(y=20, line_dash="dash", line_color="green", row=current_row, col=1)
+        ]
     
-    # Mise à jour du layout
-    fig.update_layout(
-        title=f"Analyse Technique - {selected_pair_name}",
-        xaxis_title="Date",
-        yaxis_title="Prix",
-        template="plotly_dark",
-        height=800,
-        hovermode='x unified',
-        margin=dict(l=50, r=50, t=100, b=50)
+    # Ajouter toutes les traces en un seul appel
+    fig.add_traces(
+        [trace for traces in row_traces.values() for trace in traces],
+        rows=[row for row, traces in row_traces.items() for _ in traces],
+        cols=1
     )
     
     # Afficher le graphique
     st.plotly_chart(fig, use_container_width=True)
+
+
+# Charger les données
+min_mtime = _window_start(interval)
+df = load_data(selected_pair, period, interval, min_mtime)
+warm_all(period, interval, min_mtime, _skip=selected_pair)
+
+if df is None or df.empty:
+    st.error("❌ Impossible de récupérer les données. Veuillez réessayer.")
+else:
+    # Afficher les statistiques clés
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    # Extraire les séries une seule fois et indexer directement les ndarrays
+    close = df['Close'].to_numpy()
+    high = df['High'].to_numpy()
+    low = df['Low'].to_numpy()
+    
+    last_close, prev_close = close[-1], close[-2]
+    change = last_close - prev_close
+    change_pct = (change / prev_close) * 100
+    period_high, period_low = high.max(), low.min()
+    signal_label = SIGNAL_LABELS[int(df['Signal'].to_numpy()[-1])]
+    
+    with col1:
+        st.metric("Prix Actuel", f"{last_close:.5f}")
+    
+    with col2:
+        st.metric("Variation", f"{change:.5f}", f"{change_pct:.2f}%")
+    
+    with col3:
+        st.metric("Haut (52 sem.)", f"{period_high:.5f}")
+    
+    with col4:
+        st.metric("Bas (52 sem.)", f"{period_low:.5f}")
+    
+    with col5:
+        st.metric("Signal Actuel", signal_label, delta=signal_label)
+    
+    st.divider()
+    
+    render_chart(df, selected_pair_name)
     
     # Afficher les données brutes
     st.divider()
     st.subheader("📋 Données Brutes")
     
+    tail, stats = display_tables((selected_pair, period, interval, min_mtime, df.index[-1]), df)
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.write("Affichage des dernières 10 barres :")
-        display_cols = ['Open', 'High', 'Low', 'Close', 'RSI', 'MACD', 'Signal']
-        st.dataframe(df[display_cols].tail(10), use_container_width=True)
+        st.dataframe(tail, use_container_width=True)
     
     with col2:
         st.write("Statistiques descriptives :")
-        st.dataframe(df[['Open', 'High', 'Low', 'Close']].describe(), use_container_width=True)
+        # Table statique : pas de grille interactive à initialiser côté navigateur
+        st.table(stats)
 
 # Footer
 st.divider()
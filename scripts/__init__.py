@@ -0,0 +1 @@
+"""Acquisition des données Forex et calcul des indicateurs techniques."""
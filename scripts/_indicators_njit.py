@@ -0,0 +1,214 @@
+"""
+Noyaux Numba pour le calcul des indicateurs techniques.
+Chaque fonction opère sur des np.ndarray bruts en une seule passe O(N).
+Les périodes de chauffe sont remplies de NaN, comme avec la librairie ta.
+Les séries sont en float32 ; les accumulateurs internes restent en float64.
+
+Les signatures explicites compilent les noyaux dès l'import et cache=True
+conserve le code machine dans __pycache__ : les processus suivants le
+rechargent sans inférence de types ni passe LLVM.
+"""
+
+import numpy as np
+
+from ._njit import njit
+
+
+@njit('float32[:](float32[:], float64, int64)', cache=True)
+def _ewm(x, alpha, min_periods):
+    """
+    Moyenne exponentielle récursive (équivalent de ewm(adjust=False)).
+
+    Les NaN de tête sont ignorés : la récursion démarre à la première
+    valeur valide.
+    """
+    size = x.shape[0]
+    out = np.full(size, np.nan, dtype=np.float32)
+    start = 0
+    while start < size and np.isnan(x[start]):
+        start += 1
+    if start == size:
+        return out
+    acc = np.float64(x[start])
+    for i in range(start, size):
+        if i > start:
+            acc = alpha * x[i] + (1.0 - alpha) * acc
+        if i - start + 1 >= min_periods:
+            out[i] = acc
+    return out
+
+
+@njit('float32[:](float32[:], int64)', cache=True)
+def ema(x, n):
+    """Moyenne mobile exponentielle de période n."""
+    return _ewm(x, 2.0 / (n + 1.0), n)
+
+
+@njit('UniTuple(float32[:], 5)(float32[:], int64, int64, float64)', cache=True)
+def sma_bb(x, w_small, w_large, k):
+    """
+    SMA courte, SMA longue et Bandes de Bollinger en une seule passe.
+
+    Les bandes portent sur la fenêtre courte : sa moyenne et sa variance
+    glissantes sont mises à jour par Welford (écart-type de population,
+    comme ta). Retourne (sma_small, sma_large, bb_mid, bb_high, bb_low).
+    """
+    size = x.shape[0]
+    sma_small = np.full(size, np.nan, dtype=np.float32)
+    sma_large = np.full(size, np.nan, dtype=np.float32)
+    mid = np.full(size, np.nan, dtype=np.float32)
+    high = np.full(size, np.nan, dtype=np.float32)
+    low = np.full(size, np.nan, dtype=np.float32)
+    mean = 0.0
+    m2 = 0.0
+    acc_large = 0.0
+    for i in range(size):
+        v = x[i]
+
+        # Fenêtre courte : moyenne et variance glissantes
+        if i < w_small:
+            d = v - mean
+            mean += d / (i + 1)
+            m2 += d * (v - mean)
+        else:
+            old = x[i - w_small]
+            new_mean = mean + (v - old) / w_small
+            m2 += (v - old) * (v - new_mean + old - mean)
+            mean = new_mean
+        if i >= w_small - 1:
+            std = np.sqrt(max(m2 / w_small, 0.0))
+            sma_small[i] = mean
+            mid[i] = mean
+            high[i] = mean + k * std
+            low[i] = mean - k * std
+
+        # Fenêtre longue : somme glissante
+        acc_large += v
+        if i >= w_large:
+            acc_large -= x[i - w_large]
+        if i >= w_large - 1:
+            sma_large[i] = acc_large / w_large
+    return sma_small, sma_large, mid, high, low
+
+
+@njit('float32[:](float32[:], int64)', cache=True)
+def rsi(close, n):
+    """RSI avec lissage de Wilder (alpha = 1/n)."""
+    size = close.shape[0]
+    out = np.full(size, np.nan, dtype=np.float32)
+    alpha = 1.0 / n
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, size):
+        d = close[i] - close[i - 1]
+        gain = d if d > 0.0 else 0.0
+        loss = -d if d < 0.0 else 0.0
+        avg_gain += alpha * (gain - avg_gain)
+        avg_loss += alpha * (loss - avg_loss)
+        if i >= n - 1:
+            if avg_loss == 0.0:
+                out[i] = 100.0
+            else:
+                out[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return out
+
+
+@njit('UniTuple(float32[:], 3)(float32[:], int64, int64, int64)', cache=True)
+def macd(close, fast, slow, signal):
+    """MACD : ligne, ligne de signal et histogramme."""
+    line = ema(close, fast) - ema(close, slow)
+    sig = _ewm(line, 2.0 / (signal + 1.0), signal)
+    return line, sig, line - sig
+
+
+@njit('UniTuple(float32[:], 2)(float32[:], float32[:], float32[:], int64, int64)', cache=True)
+def stoch(high, low, close, n, d):
+    """
+    Oscillateur stochastique (%K, %D) en une seule passe.
+
+    Les extrema glissants sont suivis par deux files monotones d'indices,
+    stockées dans des tampons circulaires de capacité n : O(N) au lieu de
+    O(N·n). %D, moyenne de %K sur d barres, est calculé dans la même boucle.
+    """
+    size = close.shape[0]
+    k_out = np.full(size, np.nan, dtype=np.float32)
+    d_out = np.full(size, np.nan, dtype=np.float32)
+    qmin = np.empty(n, np.int64)
+    qmax = np.empty(n, np.int64)
+    hmin = cmin = 0
+    hmax = cmax = 0
+    for i in range(size):
+        # Retirer en tête l'indice sorti de la fenêtre
+        if cmin > 0 and qmin[hmin] <= i - n:
+            hmin = (hmin + 1) % n
+            cmin -= 1
+        if cmax > 0 and qmax[hmax] <= i - n:
+            hmax = (hmax + 1) % n
+            cmax -= 1
+
+        # Retirer en queue les valeurs dominées, puis empiler i
+        while cmin > 0 and low[qmin[(hmin + cmin - 1) % n]] >= low[i]:
+            cmin -= 1
+        qmin[(hmin + cmin) % n] = i
+        cmin += 1
+
+        while cmax > 0 and high[qmax[(hmax + cmax - 1) % n]] <= high[i]:
+            cmax -= 1
+        qmax[(hmax + cmax) % n] = i
+        cmax += 1
+
+        if i >= n - 1:
+            lo = low[qmin[hmin]]
+            rng = high[qmax[hmax]] - lo
+            if rng > 0.0:
+                k_out[i] = 100.0 * (close[i] - lo) / rng
+
+        if i >= n + d - 2:
+            acc = 0.0
+            for j in range(d):
+                acc += k_out[i - j]
+            d_out[i] = acc / d
+    return k_out, d_out
+
+
+@njit('float32[:](float32[:], float32[:], float32[:], int64)', cache=True)
+def atr(high, low, close, n):
+    """Average True Range avec lissage de Wilder."""
+    size = close.shape[0]
+    out = np.full(size, np.nan, dtype=np.float32)
+    acc = 0.0
+    for i in range(size):
+        if i == 0:
+            tr = high[0] - low[0]
+        else:
+            tr = max(high[i], close[i - 1]) - min(low[i], close[i - 1])
+        if i < n:
+            acc += tr
+            if i == n - 1:
+                acc /= n
+                out[i] = acc
+        else:
+            acc = (acc * (n - 1) + tr) / n
+            out[i] = acc
+    return out
+
+
+_WARMED = False
+
+
+def _warm_up():
+    """Appelle chaque noyau sur un petit tableau pour charger le code compilé."""
+    global _WARMED
+    if _WARMED:
+        return
+    _WARMED = True
+    dummy = np.zeros(64, dtype=np.float32)
+    sma_bb(dummy, 20, 50, 2.0)
+    ema(dummy, 12)
+    rsi(dummy, 14)
+    macd(dummy, 12, 26, 9)
+    stoch(dummy, dummy, dummy, 14, 3)
+    atr(dummy, dummy, dummy, 14)
+
+
+_warm_up()
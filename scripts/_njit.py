@@ -0,0 +1,19 @@
+"""
+Décorateur njit avec repli lorsque Numba n'est pas installé.
+Sans numba, les noyaux décorés s'exécutent simplement en Python pur.
+"""
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    def njit(*args, **kwargs):
+        """Remplace numba.njit par un décorateur neutre."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+__all__ = ["njit"]
@@ -3,11 +3,18 @@ Module d'acquisition de données Forex et calcul des indicateurs techniques.
 Utilise yfinance pour récupérer les données historiques des paires de devises.
 """
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
-import ta
 from datetime import datetime, timedelta
 import os
+import tempfile
+
+from ._indicators_njit import atr, ema, macd, rsi, sma_bb, stoch
+
+# Libellés des codes de la colonne Signal
+SIGNAL_LABELS = {-1: 'SELL', 0: 'HOLD', 1: 'BUY'}
+
 
 class ForexDataFetcher:
     """Classe pour récupérer et traiter les données Forex."""
@@ -20,35 +27,100 @@ class ForexDataFetcher:
             data_dir (str): Répertoire pour stocker les données.
         """
         self.data_dir = data_dir
+        # Dernier calcul d'indicateurs : (empreinte des données, résultat)
+        self._last = None
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
     
-    def fetch_forex_data(self, pair="EURUSD=X", period="1y", interval="1d"):
+    def _cache_path(self, pair, period, interval):
+        """
+        Retourne le chemin du cache Parquet associé à une requête.
+        
+        Args:
+            pair (str): Paire de devises.
+            period (str): Période.
+            interval (str): Intervalle.
+        
+        Returns:
+            str: Chemin du fichier Parquet.
+        """
+        filename = f"{pair.replace('=', '_')}_{period}_{interval}.parquet"
+        return os.path.join(self.data_dir, filename)
+    
+    def _write_cache(self, data, path):
+        """
+        Écrit le cache Parquet de façon atomique.
+        
+        Chaque écriture passe par son propre fichier temporaire avant
+        `os.replace` : un lecteur ne voit jamais de fichier partiel et deux
+        écritures concurrentes ne se gênent pas. Un échec n'est pas bloquant.
+        
+        Args:
+            data (pd.DataFrame): Données à mettre en cache.
+            path (str): Chemin du fichier Parquet.
+        """
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, suffix='.parquet.tmp')
+            os.close(fd)
+            data.to_parquet(tmp_path, compression='snappy')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"✗ Échec de l'écriture du cache {path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def fetch_forex_data(self, pair="EURUSD=X", period="1y", interval="1d", min_mtime=None):
         """
         Récupère les données historiques d'une paire Forex.
         
+        Les résultats sont conservés dans un cache Parquet sur disque, réutilisé
+        s'il a été écrit à partir de `min_mtime`.
+        
         Args:
             pair (str): Paire de devises (ex: EURUSD=X, GBPUSD=X).
             period (str): Période (ex: 1y, 6mo, 3mo, 1mo).
             interval (str): Intervalle (ex: 1d, 1h, 15m).
+            min_mtime (float, optional): Date d'écriture minimale (timestamp Unix)
+                du cache disque, en général le début de la fenêtre de validité
+                courante. None force le téléchargement.
         
         Returns:
-            pd.DataFrame: DataFrame contenant les données OHLCV.
+            pd.DataFrame: DataFrame contenant les données OHLC.
         """
         try:
+            path = self._cache_path(pair, period, interval)
+            if (min_mtime is not None and os.path.exists(path)
+                    and os.path.getmtime(path) >= min_mtime):
+                data = pd.read_parquet(path)
+                print(f"✓ {len(data)} barres chargées depuis le cache pour {pair}")
+                return data
+            
             print(f"Récupération des données pour {pair}...")
-            data = yf.download(pair, period=period, interval=interval, progress=False)
+            data = yf.Ticker(pair).history(
+                period=period, interval=interval,
+                auto_adjust=False, actions=False, prepost=False
+            )
             
             if data.empty:
                 print(f"Aucune donnée trouvée pour {pair}")
                 return None
             
-            # Renommer les colonnes pour cohérence
-            data.columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+            # Ne garder que l'OHLC (le volume des paires Forex est toujours nul sur Yahoo)
+            data = data[['Open', 'High', 'Low', 'Close']]
+            
+            # Comme yf.download, retirer le fuseau horaire des barres journalières et plus
+            if not interval.endswith(('m', 'h')) and data.index.tz is not None:
+                data.index = data.index.tz_localize(None)
             
             # Supprimer les lignes avec des NaN
             data = data.dropna()
             
+            # La précision float32 suffit pour des cotations Forex
+            data = data.astype({col: np.float32 for col in ['Open', 'High', 'Low', 'Close']})
+            
+            self._write_cache(data, path)
+            
             print(f"✓ {len(data)} barres récupérées pour {pair}")
             return data
         
@@ -61,7 +133,7 @@ class ForexDataFetcher:
         Calcule les indicateurs techniques pour un DataFrame.
         
         Args:
-            df (pd.DataFrame): DataFrame contenant les données OHLCV.
+            df (pd.DataFrame): DataFrame contenant les données OHLC.
         
         Returns:
             pd.DataFrame: DataFrame augmenté avec les indicateurs.
@@ -70,40 +142,60 @@ class ForexDataFetcher:
             return df
         
         try:
-            # Moyennes Mobiles
-            df['SMA_20'] = ta.trend.sma_indicator(df['Close'], window=20)
-            df['SMA_50'] = ta.trend.sma_indicator(df['Close'], window=50)
-            df['EMA_12'] = ta.trend.ema_indicator(df['Close'], window=12)
-            df['EMA_26'] = ta.trend.ema_indicator(df['Close'], window=26)
+            # Court-circuit si les données (index compris) sont identiques au
+            # dernier appel. Dans l'application, _compute met déjà en cache par
+            # contenu : ce mémo ne sert qu'aux appels directs répétés. L'instance
+            # étant partagée entre sessions, on ne lit self._last qu'une fois.
+            data_hash = hash(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+            last = self._last
+            if last is not None and last[0] == data_hash:
+                print("✓ Indicateurs déjà calculés pour ces données")
+                return last[1].copy()
+            
+            # Extraire une seule fois les séries en ndarray float32 pour les noyaux
+            # (copie modifiable : les signatures Numba refusent les vues en lecture seule)
+            close = df['Close'].to_numpy(dtype=np.float32, copy=True)
+            high = df['High'].to_numpy(dtype=np.float32, copy=True)
+            low = df['Low'].to_numpy(dtype=np.float32, copy=True)
+            
+            # Moyennes Mobiles et Bandes de Bollinger (une seule passe)
+            sma_20, sma_50, bb_mid, bb_high, bb_low = sma_bb(close, 20, 50, 2.0)
+            df['SMA_20'] = sma_20
+            df['SMA_50'] = sma_50
+            df['EMA_12'] = ema(close, 12)
+            df['EMA_26'] = ema(close, 26)
             
             # Bandes de Bollinger
-            bollinger = ta.volatility.BollingerBands(df['Close'], window=20, window_dev=2)
-            df['BB_High'] = bollinger.bollinger_hband()
-            df['BB_Mid'] = bollinger.bollinger_mavg()
-            df['BB_Low'] = bollinger.bollinger_lband()
+            df['BB_High'] = bb_high
+            df['BB_Mid'] = bb_mid
+            df['BB_Low'] = bb_low
             
             # RSI (Relative Strength Index)
-            df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
+            rsi_values = rsi(close, 14)
+            df['RSI'] = rsi_values
             
             # MACD (Moving Average Convergence Divergence)
-            macd = ta.trend.MACD(df['Close'])
-            df['MACD'] = macd.macd()
-            df['MACD_Signal'] = macd.macd_signal()
-            df['MACD_Diff'] = macd.macd_diff()
+            macd_line, macd_signal, macd_diff = macd(close, 12, 26, 9)
+            df['MACD'] = macd_line
+            df['MACD_Signal'] = macd_signal
+            df['MACD_Diff'] = macd_diff
             
             # Stochastique
-            stoch = ta.momentum.StochasticOscillator(df['High'], df['Low'], df['Close'], window=14)
-            df['Stoch_K'] = stoch.stoch()
-            df['Stoch_D'] = stoch.stoch_signal()
+            stoch_k, stoch_d = stoch(high, low, close, 14, 3)
+            df['Stoch_K'] = stoch_k
+            df['Stoch_D'] = stoch_d
             
             # ATR (Average True Range)
-            df['ATR'] = ta.volatility.average_true_range(df['High'], df['Low'], df['Close'], window=14)
+            df['ATR'] = atr(high, low, close, 14)
             
-            # Signaux simples
-            df['Signal'] = 'HOLD'
-            df.loc[df['RSI'] < 30, 'Signal'] = 'BUY'
-            df.loc[df['RSI'] > 70, 'Signal'] = 'SELL'
+            # Signaux simples, stockés en codes int8 (voir SIGNAL_LABELS)
+            signal = np.zeros(len(df), dtype=np.int8)
+            signal[rsi_values < 30] = 1
+            signal[rsi_values > 70] = -1
+            df['Signal'] = signal
             
+            # Conserver le résultat renvoyé sans copie supplémentaire ; un hit en renvoie une copie
+            self._last = (data_hash, df)
             print("✓ Indicateurs calculés avec succès")
             return df
         
@@ -113,19 +205,19 @@ class ForexDataFetcher:
     
     def save_data(self, df, filename):
         """
-        Sauvegarde les données dans un fichier CSV.
+        Sauvegarde les données dans un fichier Parquet.
         
         Args:
             df (pd.DataFrame): DataFrame à sauvegarder.
             filename (str): Nom du fichier.
         """
         filepath = os.path.join(self.data_dir, filename)
-        df.to_csv(filepath)
+        df.to_parquet(filepath, compression='snappy')
         print(f"✓ Données sauvegardées dans {filepath}")
     
     def load_data(self, filename):
         """
-        Charge les données depuis un fichier CSV.
+        Charge les données depuis un fichier Parquet.
         
         Args:
             filename (str): Nom du fichier.
@@ -135,7 +227,7 @@ class ForexDataFetcher:
         """
         filepath = os.path.join(self.data_dir, filename)
         if os.path.exists(filepath):
-            return pd.read_csv(filepath, index_col=0, parse_dates=True)
+            return pd.read_parquet(filepath)
         return None
 
 
@@ -156,7 +248,7 @@ def get_available_pairs():
 
 
 if __name__ == "__main__":
-    # Test du module
+    # Test du module (python -m scripts.data_fetcher)
     fetcher = ForexDataFetcher()
     
     # Récupérer les données pour EUR/USD
@@ -167,7 +259,7 @@ if __name__ == "__main__":
         df = fetcher.calculate_indicators(df)
         
         # Sauvegarder les données
-        fetcher.save_data(df, "EURUSD_data.csv")
+        fetcher.save_data(df, "EURUSD_data.parquet")
         
         # Afficher les dernières lignes
         print("\nDernières données:")